@@ -1,14 +1,44 @@
 # analyze_sustain.py
 import glob, os, json
-from opencda.sustainability.plotting import plot_vehicle_energy, plot_eco_scores, plot_grid_heatmap
-
-logs = glob.glob("cache/sustainability_logs/vehicle_*_sustain.csv")
-for f in logs:
-    plot_vehicle_energy(f)
-
-summary = "cache/sustainability_logs/sustainability_summary.json"
-if os.path.exists(summary):
-    plot_eco_scores(summary)
-    plot_grid_heatmap(summary)
-else:
-    print("Summary not found:", summary)
+from multiprocessing import Pool, cpu_count
+from opencda.sustainability.plotting import plot_vehicle_energy, plot_eco_scores, plot_grid_heatmap, load_summary
+import matplotlib.pyplot as plt
+
+# one Figure per process, reused for every per-vehicle energy plot
+_energy_ax = None
+
+
+def _init_energy_figure():
+    global _energy_ax
+    _, _energy_ax = plt.subplots(figsize=(8,4))
+
+
+def _plot_energy(csv_path):
+    plot_vehicle_energy(csv_path, ax=_energy_ax)
+
+
+def main():
+    logs = glob.glob("cache/sustainability_logs/vehicle_*_sustain.csv")
+    # the per-vehicle plots are independent, spread them over all cores
+    if len(logs) > 1:
+        chunksize = max(1, len(logs) // (4 * cpu_count()))
+        with Pool(initializer=_init_energy_figure) as pool:
+            for _ in pool.imap_unordered(_plot_energy, logs, chunksize=chunksize):
+                pass
+    else:
+        for f in logs:
+            plot_vehicle_energy(f)
+
+    summary = "cache/sustainability_logs/sustainability_summary.json"
+    if os.path.exists(summary):
+        # parse the summary once and share it between the plots
+        s = load_summary(summary)
+        summary_dir = os.path.dirname(summary)
+        plot_eco_scores(s, summary_dir=summary_dir)
+        plot_grid_heatmap(s, summary_dir=summary_dir)
+    else:
+        print("Summary not found:", summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,14 +2,31 @@
 # Place at: C:\Users\goton\OpenCDA\opencda\sustainability\evaluator.py
 
 import os, json
-from opencda.sustainability.metrics import SustainabilityMetrics
+import numpy as np
+from opencda.sustainability.metrics import SustainabilityMetrics, flush_physics
 
 class SustainabilityEvaluator:
     def __init__(self, map_bounds=None, cell_size_m=50, log_folder="cache/sustainability_logs", config=None):
         self.metrics = {}  # vehicle_id -> SustainabilityMetrics
-        self.grid = {}     # (i,j) -> co2_g
         self.map_bounds = map_bounds or {'min_x': -1000, 'min_y': -1000, 'max_x': 1000, 'max_y': 1000}
         self.cell_size = cell_size_m
+        # co2_g emitted inside each (i,j) cell of the bounded map; the
+        # origin and inverse cell size are cached for the index math
+        self._min_x = float(self.map_bounds['min_x'])
+        self._min_y = float(self.map_bounds['min_y'])
+        self._inv_cs = 1.0 / self.cell_size
+        self._nx = int((self.map_bounds['max_x'] - self._min_x) * self._inv_cs) + 1
+        self._ny = int((self.map_bounds['max_y'] - self._min_y) * self._inv_cs) + 1
+        self._grid = np.zeros((self._nx, self._ny))
+        # structure-of-arrays view of the registered vehicles: metrics in
+        # slot order and one physics parameter row per slot. Buffered
+        # ticks of all vehicles are evaluated together every _chunk ticks.
+        self._slots = []
+        self._params = None
+        self._chunk = None
+        self._pending = 0
+        # elapsed time of the last processed snapshot
+        self._last_ts = -1.0
         self.log_folder = log_folder
         os.makedirs(self.log_folder, exist_ok=True)
         self.config = config or {}
@@ -17,35 +34,68 @@ class SustainabilityEvaluator:
     def register_vehicle(self, vehicle, veh_params=None):
         if vehicle.id in self.metrics:
             return
-        m = SustainabilityMetrics(vehicle, output_folder=self.log_folder, vehicle_id=vehicle.id, veh_params=veh_params, model_type=self.config.get('model_type','auto'))
+        m = SustainabilityMetrics(vehicle, output_folder=self.log_folder, vehicle_id=vehicle.id, veh_params=veh_params,
+                                  model_type=self.config.get('model_type','auto'), co2_sink=self._add_co2)
         self.metrics[vehicle.id] = m
+        self._slots.append(m)
+        self._params = np.array([s.physics_params for s in self._slots])
+        self._chunk = min(self._chunk or len(m._buf), len(m._buf))
+
+    def _flush(self):
+        flush_physics(self._slots, self._params, self._add_co2)
+        self._pending = 0
+
+    def _add_co2(self, xs, ys, co2):
+        """Deposit per-tick co2 deltas into the grid cells they were emitted in."""
+        # floor, not truncation, so positions just below the minimum bound
+        # fall outside the grid instead of into the first cell
+        i = np.floor((xs - self._min_x) * self._inv_cs).astype(np.intp)
+        j = np.floor((ys - self._min_y) * self._inv_cs).astype(np.intp)
+        inside = (i >= 0) & (i < self._nx) & (j >= 0) & (j < self._ny)
+        np.add.at(self._grid, (i[inside], j[inside]), co2[inside])
 
     def update(self, snapshot):
-        # call update on each vehicle metrics
+        # a snapshot that was already processed is skipped
+        ts = snapshot.timestamp.elapsed_seconds
+        if ts == self._last_ts:
+            return
+        self._last_ts = ts
+        dt = snapshot.timestamp.delta_seconds
+        if dt <= 0:
+            return
+        # call update on each vehicle metrics, which only buffers the tick;
+        # the physics of all vehicles runs in one pass every _chunk ticks
+        # and deposits the co2 of every tick in the grid via _add_co2
         for vid, m in list(self.metrics.items()):
             try:
-                m.update(snapshot)
-                loc = m.vehicle.get_location()
-                i = int((loc.x - self.map_bounds['min_x']) / self.cell_size)
-                j = int((loc.y - self.map_bounds['min_y']) / self.cell_size)
-                self.grid.setdefault((i,j), 0.0)
-                # add current accumulated co2 (simple: add delta since last update isn't stored; using total is ok for proxies)
-                self.grid[(i,j)] += m.co2_g
+                m.update(dt, ts)
             except Exception as e:
                 # avoid crashing the sim if a metric update fails
                 print(f"[SustEval] update error for vehicle {vid}: {e}")
+        self._pending += 1
+        if self._chunk is not None and self._pending >= self._chunk:
+            try:
+                self._flush()
+            except Exception as e:
+                print(f"[SustEval] physics flush error: {e}")
+                self._pending = 0
 
     def finalize(self, out_path=None):
+        out_path = out_path or os.path.join(self.log_folder, 'sustainability_summary.json')
+        # the grid goes to a compact npz sibling; the json only keeps the
+        # per-vehicle summary and a reference to the grid file
+        grid_path = os.path.splitext(out_path)[0] + '.grid.npz'
         summary = {
             'vehicles': [],
-            'grid': []
+            'grid_file': os.path.basename(grid_path),
+            'grid_shape': [self._nx, self._ny]
         }
+        self._flush()
         for vid, m in self.metrics.items():
             summary['vehicles'].append(m.results())
             m.close()
-        for (i,j), co2 in self.grid.items():
-            summary['grid'].append({'i': i, 'j': j, 'co2_g': co2})
-        out_path = out_path or os.path.join(self.log_folder, 'sustainability_summary.json')
+        i, j = np.nonzero(self._grid)
+        np.savez_compressed(grid_path, i=i, j=j, co2=self._grid[i, j])
         with open(out_path, 'w') as f:
             json.dump(summary, f, indent=2)
         print(f"[SustEval] Summary written to {out_path}")
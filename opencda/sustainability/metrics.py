@@ -1,9 +1,120 @@
 # metrics.py
 # Improved sustainability metrics for OpenCDA + CARLA 0.9.12
 
-import os, csv, math
+import os, math
 import numpy as np
-from opencda.sustainability.utils import aerodynamic_force, rolling_resistance_force, gravity_force_on_slope
+import pandas as pd
+from opencda.sustainability.utils import G, RHO_AIR, CO2_FUEL_G_PER_J, J_PER_KWH, physics_step, \
+    GRID_CO2_G_PER_KWH, DEFAULT_CD, DEFAULT_FRONTAL_AREA, DEFAULT_CRR, DEFAULT_DRIVETRAIN_EFF
+
+# pyarrow is optional; without it only the CSV log is written
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+# defaults for the per-vehicle parameters (mass comes from CARLA unless given)
+DEFAULT_VEH_PARAMS = {
+    'cd': DEFAULT_CD,
+    'area': DEFAULT_FRONTAL_AREA,
+    'crr': DEFAULT_CRR,
+    'drivetrain_eff': DEFAULT_DRIVETRAIN_EFF,
+    'is_ev': False,
+    'grid_co2_g_per_kwh': GRID_CO2_G_PER_KWH,
+    'chunk_size': 64,
+    'batch_size': 256,
+    'expected_samples': 1024,
+    'verbose': False,
+}
+
+# logged columns and the number of decimals kept in the CSV
+LOG_COLUMNS = (
+    ('timestamp', None), ('x', 3), ('y', 3), ('speed_m_s', 3),
+    ('long_accel_m_s2', 3), ('jerk', 3), ('power_w', 3), ('dt_s', 4),
+    ('cumulative_energy_j', 3), ('cumulative_co2_g', 3), ('regen_j', 3),
+    ('eco_score', 2),
+)
+
+# raw per-tick sample layout: velocity, acceleration, dt, slope,
+# idle allowed (1.0 / 0.0), elapsed time, location, sampled dt (0.0 if
+# the tick is not logged)
+_VEL, _ACC = slice(0, 3), slice(3, 6)
+_DT, _SLOPE, _IDLE_OK, _T, _X, _Y, _SAMPLE_DT = range(6, 13)
+_RAW_FIELDS = 13
+
+
+def _eco_score(distance_m, jerk_std, harsh_accel, harsh_brake, idle_time_s):
+    """Eco score formula, works on scalars and numpy arrays."""
+    dist_km = np.maximum(distance_m / 1000.0, 0.1)
+
+    # soft, realistic weights
+    penalty = (
+        (jerk_std * 1.2) +
+        (harsh_accel * 0.08) +
+        (harsh_brake * 0.12) +
+        (idle_time_s * 0.01)
+    ) / dist_km
+
+    return np.maximum(0.0, 100.0 - penalty)
+
+
+def flush_physics(metrics, params, co2_sink=None):
+    """
+    Evaluate the buffered ticks of several vehicles with one kernel call.
+
+    Parameters
+    ----------
+    metrics : list
+        SustainabilityMetrics whose buffers are drained.
+    params : np.ndarray
+        Structure-of-arrays table with one row per vehicle, in the same
+        order: the physics_params row (physics_step's constant arguments).
+    co2_sink : callable
+        Optional callable(x, y, co2_g) receiving the positions and CO2 of
+        each vehicle's ticks once they have been accumulated.
+    """
+    counts = np.array([m._bi for m in metrics])
+    if counts.sum() == 0:
+        return
+    # a buffer is only reset by _accumulate, in the same step that stores
+    # its totals, so a failing flush leaves the ticks for the next one
+    buf = np.concatenate([m._buf[:m._bi] for m in metrics])
+
+    v = buf[:, _VEL]
+    a = buf[:, _ACC]
+    speed = np.sqrt(np.einsum('ij,ij->i', v, v))
+
+    # LONGITUDINAL ACCELERATION (FIXED), only divided where speed > 0.1
+    accel = np.divide(np.einsum('ij,ij->i', v, a), speed,
+                      out=np.zeros_like(speed), where=speed > 0.1)
+
+    # POWER + ENERGY + CO2, vehicle parameters repeated per tick
+    tick_params = np.repeat(params.T, counts, axis=1)
+    power_w, energy_step, co2_step = physics_step(
+        speed, accel, np.ascontiguousarray(buf[:, _SLOPE]), *tick_params,
+        np.ascontiguousarray(buf[:, _DT]))
+
+    end = np.cumsum(counts)
+    for m, start, stop in zip(metrics, end - counts, end):
+        if stop == start:
+            continue
+        log_rows = m._accumulate(buf[start:stop], speed[start:stop],
+                                 accel[start:stop], power_w[start:stop],
+                                 energy_step[start:stop], co2_step[start:stop])
+        # the chunk is committed at this point; side effects that fail
+        # below must not make its ticks count twice
+        if co2_sink is not None:
+            try:
+                co2_sink(buf[start:stop, _X], buf[start:stop, _Y],
+                         co2_step[start:stop])
+            except Exception as e:
+                print(f"[SUST] co2 sink failed for vehicle {m.id}: {e}")
+        if log_rows is not None:
+            try:
+                m._append_rows(log_rows)
+            except Exception as e:
+                print(f"[SUST] csv write failed for vehicle {m.id}: {e}")
 
 
 class SustainabilityMetrics:
@@ -15,37 +126,68 @@ class SustainabilityMetrics:
     """
 
     def __init__(self, vehicle, output_folder="cache/sustainability_logs",
-                 vehicle_id=None, veh_params=None, model_type="auto", sample_hz=5):
+                 vehicle_id=None, veh_params=None, model_type="auto", sample_hz=5,
+                 co2_sink=None):
 
         self.vehicle = vehicle
         self.id = vehicle_id or vehicle.id
-        
-        print(f"[SUST] Vehicle {self.vehicle.id} role:",
-        self.vehicle.attributes.get("role_name"))
-        
-        self.veh_params = veh_params or {}
+        self.veh_params = p = {**DEFAULT_VEH_PARAMS, **(veh_params or {})}
+
+        # read the RPC-backed attributes once
+        self._role_name = vehicle.attributes.get("role_name")
+        if p['verbose']:
+            print(f"[SUST] Vehicle {self.id} role:", self._role_name)
+
+        # optional callable(x, y, co2_g) receiving the per-tick positions
+        # and emitted CO2 of every evaluated chunk, e.g. for a spatial grid
+        self.co2_sink = co2_sink
 
         # -------------------------------------------------------
         # VEHICLE PHYSICS PARAMETERS
         # -------------------------------------------------------
-        try:
-            phys = vehicle.get_physics_control()
-            mass = phys.mass
-        except Exception:
-            mass = self.veh_params.get('mass', 1500.0)
-
-        self.mass = self.veh_params.get('mass', mass)
-        self.cd = self.veh_params.get('cd', 0.30)
-        self.area = self.veh_params.get('area', 2.2)
-        self.crr = self.veh_params.get('crr', 0.01)
-        self.drivetrain_eff = self.veh_params.get('drivetrain_eff', 0.90)
-        self.is_ev = self.veh_params.get('is_ev', False)
+        if 'mass' in p:
+            self.mass = p['mass']
+        else:
+            # one physics control RPC per vehicle, only when needed
+            try:
+                self.mass = vehicle.get_physics_control().mass
+            except Exception:
+                self.mass = 1500.0
+
+        self.cd = p['cd']
+        self.area = p['area']
+        self.crr = p['crr']
+        self.drivetrain_eff = p['drivetrain_eff']
+        self.is_ev = p['is_ev']
 
         if model_type == "ev":
             self.is_ev = True
         elif model_type == "ice":
             self.is_ev = False
 
+        # fused constants, so the power formula needs no per-tick
+        # recomputation of drag / rolling terms or efficiency division
+        self._k_aero = 0.5 * RHO_AIR * self.cd * self.area
+        self._f_roll = self.crr * self.mass * G
+        self._m_g = self.mass * G
+        self._inv_eff = 1.0 / max(self.drivetrain_eff, 1e-6)
+        # CO2 per Joule of positive energy, fixed per vehicle type
+        self._co2_per_j = p['grid_co2_g_per_kwh'] / J_PER_KWH if self.is_ev \
+            else CO2_FUEL_G_PER_J
+
+        # one row of the structure-of-arrays parameter table that
+        # flush_physics() evaluates all vehicles with, in the argument
+        # order of physics_step
+        self.physics_params = np.array([
+            self._k_aero, self._f_roll, self._m_g, self.mass, self._inv_eff,
+            self.drivetrain_eff, self._co2_per_j
+        ], dtype=float)
+
+        # compile the physics kernel (when numba is available) now rather
+        # than on the first flush
+        physics_step(*np.zeros((3, 1)), *self.physics_params[:, None].copy(),
+                     np.ones(1))
+
         # -------------------------------------------------------
         # CUMULATIVE METRICS
         # -------------------------------------------------------
@@ -59,10 +201,25 @@ class SustainabilityMetrics:
         self.harsh_brake = 0
         self.idle_time_s = 0.0
 
-        self.jerk_samples = []
+        # running jerk mean / sum of squared deviations, merged chunk by
+        # chunk with the parallel variance update, so the jerk spread
+        # needs neither a growing sample list nor np.std
+        self._jerk_n = 0
+        self._jerk_mean = 0.0
+        self._jerk_M2 = 0.0
         self.last_accel = 0.0
         self.last_speed = 0.0
 
+        # eco score is only recomputed after its inputs change
+        self._score_dirty = True
+        self._score_cache = 100.0
+
+        # raw samples are collected per tick and the physics is evaluated
+        # for chunk_size ticks at once in _flush_physics()
+        chunk_size = max(1, int(p['chunk_size']))
+        self._buf = np.empty((chunk_size, _RAW_FIELDS))
+        self._bi = 0
+
         # -------------------------------------------------------
         # CSV LOGGING SETUP
         # -------------------------------------------------------
@@ -70,127 +227,243 @@ class SustainabilityMetrics:
         self.csv_path = os.path.join(output_folder, f"vehicle_{self.id}_sustain.csv")
         self.sample_hz = sample_hz
         self._accum_dt = 0.0
-
-        self.csv_file = open(self.csv_path, 'w', newline='')
-        self.csv_writer = csv.writer(self.csv_file)
-        self.csv_writer.writerow([
-            'timestamp','x','y','speed_m_s','long_accel_m_s2','jerk','power_w',
-            'dt_s','cumulative_energy_j','cumulative_co2_g','regen_j','eco_score'
-        ])
+        self._sample_period = 1.0 / max(1, sample_hz)
+
+        # samples are kept in preallocated numpy columns (grown 2x when
+        # full) and written to the CSV in batches of batch_size rows.
+        # With pyarrow installed the full-precision columns are also
+        # written to a feather file on close.
+        self.batch_size = max(1, int(p['batch_size']))
+        feather_path = os.path.splitext(self.csv_path)[0] + '.feather'
+        self.feather_path = feather_path if pa is not None else None
+        capacity = max(self.batch_size,
+                       int(p['expected_samples']))
+        self._cols = {name: np.empty(capacity) for name, _ in LOG_COLUMNS}
+        self._n = 0
+        self._written = 0
+
+        # only the header is written here; every batch is appended with
+        # pandas' C writer, so no file handle stays open in between
+        with open(self.csv_path, 'w', newline='') as f:
+            f.write(','.join(name for name, _ in LOG_COLUMNS) + '\n')
+        # a feather left by an earlier run would shadow this run's csv
+        # until close() rewrites it
+        if os.path.exists(feather_path):
+            os.remove(feather_path)
+
+    def _append_rows(self, rows):
+        """Append a block of rows given as one array per LOG_COLUMNS entry."""
+        count = len(rows[0])
+        capacity = len(self._cols['timestamp'])
+        if self._n + count > capacity:
+            while self._n + count > capacity:
+                capacity *= 2
+            for name, col in self._cols.items():
+                grown = np.empty(capacity)
+                grown[:self._n] = col[:self._n]
+                self._cols[name] = grown
+        for (name, _), values in zip(LOG_COLUMNS, rows):
+            self._cols[name][self._n:self._n + count] = values
+        self._n += count
+        if self._n - self._written >= self.batch_size:
+            self._write_csv_rows()
+
+    def _write_csv_rows(self):
+        start, end = self._written, self._n
+        if end == start:
+            return
+        columns = {}
+        for name, decimals in LOG_COLUMNS:
+            col = self._cols[name][start:end]
+            columns[name] = col if decimals is None else np.round(col, decimals)
+        pd.DataFrame(columns).to_csv(self.csv_path, mode='a', header=False,
+                                     index=False)
+        self._written = end
+        if self.feather_path is None:
+            # nothing else reads the columns, reuse them for the next batch
+            self._n = self._written = 0
+
+    def flush(self):
+        """Write all buffered CSV rows to disk."""
+        self._write_csv_rows()
 
     def close(self):
+        # separately, so rows accumulated earlier still reach the csv when
+        # the physics of the last chunk fails
         try:
-            self.csv_file.close()
-        except:
-            pass
+            self._flush_physics()
+        except Exception as e:
+            print(f"[SUST] final physics flush failed for vehicle {self.id}: {e}")
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[SUST] final csv flush failed for vehicle {self.id}: {e}")
+        if self.feather_path is not None:
+            try:
+                table = pa.table({name: col[:self._n]
+                                  for name, col in self._cols.items()})
+                feather.write_feather(table, self.feather_path)
+            except Exception as e:
+                print(f"[SUST] feather write failed for vehicle {self.id}: {e}")
 
     # ---------------------------------------------------------
     # POWER + EMISSIONS
     # ---------------------------------------------------------
     def compute_power(self, speed, accel, slope=0.0):
-        """Mechanical/electrical power in Watts."""
-        F_aero = aerodynamic_force(self.cd, self.area, speed)
-        F_roll = rolling_resistance_force(self.crr, self.mass)
-        F_grav = gravity_force_on_slope(self.mass, slope)
-        F_inertial = self.mass * accel
-
-        F_total = F_aero + F_roll + F_grav + F_inertial
-        P = F_total * speed
-
-        # drivetrain efficiency
-        if P >= 0:
-            return P / max(self.drivetrain_eff, 1e-6)
-        else:
-            return P * self.drivetrain_eff
-
+        """
+        Mechanical/electrical power in Watts, evaluated with physics_step.
+        Returns a float for scalar input and an array of the broadcast
+        shape otherwise.
+        """
+        shape = np.broadcast(speed, accel, slope).shape
+        speed, accel, slope = (
+            np.broadcast_to(np.asarray(x, dtype=float), shape).ravel()
+            for x in (speed, accel, slope))
+        n = speed.size
+        power_w = physics_step(speed, accel, slope,
+                               *np.repeat(self.physics_params[:, None], n, axis=1),
+                               np.ones(n))[0]
+        return float(power_w[0]) if shape == () else power_w.reshape(shape)
+
+    # thin wrappers kept for external callers; the kernel uses _co2_per_j
     def estimate_fuel_co2(self, power_w, dt_s):
-        if power_w <= 0:
-            return 0.0
-        E_kwh = (power_w * dt_s) / 3.6e6
-        liters = E_kwh / 8.9
-        return liters * 2310.0
+        return np.maximum(power_w, 0.0) * dt_s * CO2_FUEL_G_PER_J
 
-    def estimate_ev_co2(self, power_w, dt_s, grid_g_per_kwh=400.0):
-        E_kwh = (power_w * dt_s) / 3.6e6
-        return E_kwh * grid_g_per_kwh
+    def estimate_ev_co2(self, power_w, dt_s, grid_g_per_kwh=GRID_CO2_G_PER_KWH):
+        return power_w * dt_s * (grid_g_per_kwh / J_PER_KWH)
 
     # ---------------------------------------------------------
     # MAIN UPDATE
     # ---------------------------------------------------------
-    def update(self, snapshot, control=None, slope=0.0):
+    def update(self, dt, elapsed, control=None, slope=0.0):
+        """
+        Buffer one simulation tick.
 
-        dt = snapshot.timestamp.delta_seconds
+        dt and elapsed are the snapshot's delta_seconds and
+        elapsed_seconds, read once by the caller for all vehicles.
+        """
         if dt <= 0:
             return
+        if self._bi == len(self._buf):
+            self._flush_physics()
 
-        vel = self.vehicle.get_velocity()
-        acc = self.vehicle.get_acceleration()
+        vehicle = self.vehicle
+        vel = vehicle.get_velocity()
+        acc = vehicle.get_acceleration()
+        loc = vehicle.get_location()
+        idle_ok = control is None or getattr(control, 'throttle', 0) < 0.1
 
-        speed = math.sqrt(vel.x**2 + vel.y**2 + vel.z**2)
+        # each carla attribute is read exactly once, straight into the row
+        row = self._buf[self._bi]
+        row[:_SAMPLE_DT] = (vel.x, vel.y, vel.z, acc.x, acc.y, acc.z, dt, slope,
+                            idle_ok, elapsed,
+                            loc.x, loc.y)
 
         # -----------------------------------------------------
-        # LONGITUDINAL ACCELERATION (FIXED)
+        # CSV LOGGING (sampled)
         # -----------------------------------------------------
-        if speed > 0.1:
-            accel = (vel.x*acc.x + vel.y*acc.y + vel.z*acc.z) / speed
+        accum = self._accum_dt + dt
+        if accum >= self._sample_period:
+            row[_SAMPLE_DT] = accum
+            accum = 0.0
         else:
-            accel = 0.0
+            row[_SAMPLE_DT] = 0.0
+        self._accum_dt = accum
+
+        self._bi += 1
+
+    def _flush_physics(self):
+        """Evaluate the physics for all buffered ticks of this vehicle."""
+        flush_physics([self], self.physics_params[None], self.co2_sink)
+
+    def _accumulate(self, buf, speed, accel, power_w, energy_step, co2_step):
+        """
+        Fold one evaluated chunk into the cumulative metrics.
+
+        Everything is computed into locals first; the totals are stored and
+        the raw buffer is reset together at the end. Returns the CSV rows of
+        the sampled ticks (None when no tick was sampled) for the caller to
+        append.
+        """
+        n = len(buf)
+        dt = buf[:, _DT]
 
         # DISTANCE
-        self.distance_m += speed * dt
-
-        # POWER + ENERGY + CO2
-        power_w = self.compute_power(speed, accel, slope)
-        if power_w > 0:
-            self.energy_j += power_w * dt
-            if self.is_ev:
-                self.co2_g += self.estimate_ev_co2(power_w, dt)
-            else:
-                self.co2_g += self.estimate_fuel_co2(power_w, dt)
-        else:
-            self.regen_j += abs(power_w) * dt * 0.5
+        distance = self.distance_m + np.cumsum(speed * dt)
+
+        regen_step = np.where(power_w > 0, 0.0, -power_w * dt * 0.5)
+        energy = self.energy_j + np.cumsum(energy_step)
+        co2 = self.co2_g + np.cumsum(co2_step)
+        regen = self.regen_j + np.cumsum(regen_step)
 
         # -----------------------------------------------------
         # JERK CALCULATION (FIXED)
         # -----------------------------------------------------
-        jerk = (accel - self.last_accel) / dt
-        self.jerk_samples.append(jerk)
-        self.last_accel = accel
+        jerk = np.diff(accel, prepend=self.last_accel) / dt
+
+        # running (prefix) jerk variance after every tick of the chunk: the
+        # chunk prefixes get their own mean / M2 (sums shifted by the chunk
+        # mean) and are combined with the stored stats by the parallel merge
+        # M2 = M2_a + M2_b + delta^2 * n_a * n_b / n
+        n_a = self._jerk_n
+        n_b = np.arange(1, n + 1)
+        jerk_n = n_a + n_b
+        chunk_mean = jerk.mean()
+        shifted = jerk - chunk_mean
+        shifted_sum = np.cumsum(shifted)
+        mean_b = chunk_mean + shifted_sum / n_b
+        M2_b = np.maximum(np.cumsum(shifted * shifted) -
+                          shifted_sum * shifted_sum / n_b, 0.0)
+        delta = mean_b - self._jerk_mean
+        jerk_M2 = self._jerk_M2 + M2_b + delta * delta * n_a * n_b / jerk_n
+        jerk_mean = self._jerk_mean + delta * n_b / jerk_n
 
         # -----------------------------------------------------
         # ECO DRIVING COUNTERS
         # -----------------------------------------------------
-        if accel > 2.0:
-            self.harsh_accel += 1
-        if accel < -2.5:
-            self.harsh_brake += 1
-
-        if speed < 0.3 and (control is None or getattr(control, 'throttle', 0) < 0.1):
-            self.idle_time_s += dt
-
+        # branchless: the masks are summed as 0/1 and idle time is dt
+        # weighted by the idle mask
+        is_harsh_accel = accel > 2.0
+        is_harsh_brake = accel < -2.5
+        idle_dt = dt * ((speed < 0.3) & (buf[:, _IDLE_OK] > 0))
+
+        # running values are only needed on the logged ticks
+        rows = np.flatnonzero(buf[:, _SAMPLE_DT] > 0)
         # -----------------------------------------------------
-        # CSV LOGGING (sampled)
+        # CSV ROWS FOR THE SAMPLED TICKS
         # -----------------------------------------------------
-        self._accum_dt += dt
-        if self._accum_dt >= 1.0 / max(1, self.sample_hz):
-
-            eco_score = self.compute_eco_score()
-            loc = self.vehicle.get_location()
-
-            self.csv_writer.writerow([
-                snapshot.timestamp.elapsed_seconds,
-                round(loc.x,3), round(loc.y,3),
-                round(speed,3), round(accel,3),
-                round(jerk,3),
-                round(power_w,3),
-                round(self._accum_dt,4),
-                round(self.energy_j,3),
-                round(self.co2_g,3),
-                round(self.regen_j,3),
-                round(eco_score,2)
-            ])
-            self.csv_file.flush()
-            self._accum_dt = 0.0
+        log_rows = None
+        if len(rows):
+            harsh_accel = self.harsh_accel + np.cumsum(is_harsh_accel)[rows]
+            harsh_brake = self.harsh_brake + np.cumsum(is_harsh_brake)[rows]
+            idle_time = self.idle_time_s + np.cumsum(idle_dt)[rows]
+            jerk_std = np.sqrt(np.maximum(jerk_M2[rows], 0.0) / jerk_n[rows])
+            eco_score = _eco_score(distance[rows], jerk_std, harsh_accel,
+                                   harsh_brake, idle_time)
+            log_rows = (
+                buf[rows, _T], buf[rows, _X], buf[rows, _Y],
+                speed[rows], accel[rows], jerk[rows], power_w[rows],
+                buf[rows, _SAMPLE_DT],
+                energy[rows], co2[rows], regen[rows],
+                eco_score
+            )
+
+        totals = (float(distance[-1]), float(energy[-1]), float(co2[-1]),
+                  float(regen[-1]),
+                  self.harsh_accel + int(np.count_nonzero(is_harsh_accel)),
+                  self.harsh_brake + int(np.count_nonzero(is_harsh_brake)),
+                  self.idle_time_s + float(idle_dt.sum()),
+                  float(accel[-1]), int(jerk_n[-1]), float(jerk_mean[-1]),
+                  float(jerk_M2[-1]))
+
+        # commit: nothing below can raise
+        (self.distance_m, self.energy_j, self.co2_g, self.regen_j,
+         self.harsh_accel, self.harsh_brake, self.idle_time_s,
+         self.last_accel, self._jerk_n, self._jerk_mean,
+         self._jerk_M2) = totals
+        self._score_dirty = True
+        self._bi = 0
+        return log_rows
 
     # ---------------------------------------------------------
     # ECO SCORE (NEW REALISTIC VERSION)
@@ -200,25 +473,20 @@ class SustainabilityMetrics:
         Normalized eco score 0–100.
         Takes into account jerk, harsh events, and idle, normalized by distance.
         """
-
-        dist_km = max(self.distance_m / 1000.0, 0.1)
-        jerk_std = float(np.std(self.jerk_samples)) if len(self.jerk_samples) else 0.0
-
-        # soft, realistic weights
-        penalty = (
-            (jerk_std * 1.2) +
-            (self.harsh_accel * 0.08) +
-            (self.harsh_brake * 0.12) +
-            (self.idle_time_s * 0.01)
-        ) / dist_km
-
-        score = max(0.0, 100.0 - penalty)
-        return score
+        if not self._score_dirty:
+            return self._score_cache
+        jerk_std = math.sqrt(max(0.0, self._jerk_M2) / self._jerk_n) \
+            if self._jerk_n > 1 else 0.0
+        self._score_cache = float(_eco_score(self.distance_m, jerk_std, self.harsh_accel,
+                                             self.harsh_brake, self.idle_time_s))
+        self._score_dirty = False
+        return self._score_cache
 
     # ---------------------------------------------------------
     # FINAL RESULTS FOR SUMMARY.JSON
     # ---------------------------------------------------------
     def results(self):
+        self._flush_physics()
         return {
             'vehicle_id': self.id,
             'energy_Wh': self.energy_j / 3600.0,
@@ -3,78 +3,158 @@
 
 import os
 import pandas as pd
+import matplotlib
+# file output only; Agg is also safe to use from worker processes
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import json
 import numpy as np
 
-def plot_vehicle_energy(csv_path):
+# orjson is optional and only speeds up parsing the summary
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def load_vehicle_log(csv_path, columns=None):
+    """
+    Read a vehicle log, preferring the feather sibling when it is at least
+    as new as the csv. When columns are given only those are read, as float32.
+    """
+    feather_path = os.path.splitext(csv_path)[0] + '.feather'
+    if os.path.exists(feather_path) and \
+            os.path.getmtime(feather_path) >= os.path.getmtime(csv_path):
+        try:
+            df = pd.read_feather(feather_path, columns=columns)
+            return df.astype('float32') if columns else df
+        except ImportError:
+            pass
+    if columns is None:
+        return pd.read_csv(csv_path)
+    return pd.read_csv(csv_path, usecols=columns, engine='c',
+                       dtype={c: 'float32' for c in columns})
+
+def plot_vehicle_energy(csv_path, ax=None):
+    """
+    Save the energy curve of a vehicle log next to the csv.
+    A given ax is cleared and reused, so one Figure can serve many logs.
+    """
     if not os.path.exists(csv_path):
         print("Missing:", csv_path); return
-    df = pd.read_csv(csv_path)
-    if 'energy_j' in df.columns:
-        df['energy_Wh'] = df['energy_j'] / 3600.0
+    # sniff the header to pick the energy column, then read only that
+    header = pd.read_csv(csv_path, nrows=0).columns
+    # if cumulative was logged instead
+    energy_col = 'energy_j' if 'energy_j' in header else 'cumulative_energy_j'
+    df = load_vehicle_log(csv_path, ['timestamp', energy_col])
+    df['energy_Wh'] = df[energy_col] / 3600.0
+    own_fig = ax is None
+    if own_fig:
+        fig, ax = plt.subplots(figsize=(8,4))
     else:
-        # if cumulative was logged instead
-        df['energy_Wh'] = df['cumulative_energy_j'] / 3600.0
-    plt.figure(figsize=(8,4))
-    plt.plot(df['timestamp'], df['energy_Wh'])
-    plt.xlabel('time (s)'); plt.ylabel('Energy (Wh)')
-    plt.title(os.path.basename(csv_path))
-    out = csv_path.replace('.csv','_energy.png')
-    plt.savefig(out); plt.close()
+        fig = ax.figure
+        ax.clear()
+    ax.plot(df['timestamp'], df['energy_Wh'])
+    ax.set_xlabel('time (s)'); ax.set_ylabel('Energy (Wh)')
+    ax.set_title(os.path.basename(csv_path))
+    out = os.path.splitext(csv_path)[0] + '_energy.png'
+    fig.savefig(out)
+    if own_fig:
+        plt.close(fig)
     print("Saved:", out)
 
-def plot_eco_scores(summary_json):
-    if not os.path.exists(summary_json):
-        print("Missing:", summary_json); return
-    s = json.load(open(summary_json))
+def load_summary(summary_json):
+    """Parse a sustainability summary json file."""
+    if orjson is not None:
+        with open(summary_json, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(summary_json) as f:
+        return json.load(f)
+
+def _resolve_summary(summary_or_path, out_dir, summary_dir=None):
+    """
+    Return (summary, summary folder, output folder) for a parsed summary or
+    a json path. Files the summary refers to live in the summary folder,
+    which a parsed summary has to be given; out_dir only decides where the
+    plots go. Each of the two folders defaults to the other.
+    """
+    if isinstance(summary_or_path, dict):
+        summary_dir = summary_dir or out_dir
+        if summary_dir is None:
+            raise ValueError("summary_dir or out_dir is required for a "
+                             "parsed summary")
+        return summary_or_path, summary_dir, out_dir or summary_dir
+    if not os.path.exists(summary_or_path):
+        print("Missing:", summary_or_path)
+        return None, None, None
+    summary_dir = os.path.dirname(summary_or_path)
+    return load_summary(summary_or_path), summary_dir, out_dir or summary_dir
+
+def plot_eco_scores(summary_or_path, out_dir=None, summary_dir=None):
+    s, _, out_dir = _resolve_summary(summary_or_path, out_dir, summary_dir)
+    if s is None:
+        return
     vehicles = s.get('vehicles', [])
     ids = [v['vehicle_id'] for v in vehicles]
     scores = [v.get('eco_score', 0) for v in vehicles]
     plt.figure(figsize=(8,4))
     plt.bar([str(i) for i in ids], scores)
     plt.xlabel('vehicle id'); plt.ylabel('eco score'); plt.title('Eco Score per vehicle')
-    out = os.path.join(os.path.dirname(summary_json), 'eco_scores.png')
+    out = os.path.join(out_dir, 'eco_scores.png')
     plt.savefig(out); plt.close()
     print("Saved:", out)
 
-def plot_grid_heatmap(summary_json, cell_size=50):
-    if not os.path.exists(summary_json):
-        print("Missing:", summary_json); return
-    s = json.load(open(summary_json))
-    grid = s.get('grid', [])
-    if not grid:
+def load_grid(summary, folder):
+    """Return (i, j, co2_g) arrays of the non-empty grid cells of a summary."""
+    if 'grid_file' in summary:
+        grid_path = os.path.join(folder, summary['grid_file'])
+        if not os.path.exists(grid_path):
+            print("Missing:", grid_path)
+            return np.array([], dtype=int), np.array([], dtype=int), np.array([])
+        with np.load(grid_path) as grid:
+            return grid['i'], grid['j'], grid['co2']
+    # older summaries list the cells inline
+    grid = summary.get('grid', [])
+    return (np.array([c['i'] for c in grid], dtype=int),
+            np.array([c['j'] for c in grid], dtype=int),
+            np.array([c['co2_g'] for c in grid]))
+
+def plot_grid_heatmap(summary_or_path, cell_size=50, out_dir=None,
+                      summary_dir=None):
+    s, summary_dir, out_dir = _resolve_summary(summary_or_path, out_dir,
+                                               summary_dir)
+    if s is None:
+        return
+    xi, yi, zi = load_grid(s, summary_dir)
+    if len(zi) == 0:
         print("No grid data"); return
-    xs = [c['i'] for c in grid]; ys = [c['j'] for c in grid]; vals = [c['co2_g'] for c in grid]
-    xi = np.array(xs); yi = np.array(ys); zi = np.array(vals)
     # build matrix
     minx, maxx = xi.min(), xi.max()
     miny, maxy = yi.min(), yi.max()
     w = maxx - minx + 1; h = maxy - miny + 1
     mat = np.zeros((h, w))
-    for x,y,v in zip(xi, yi, zi):
-        mat[y-miny, x-minx] = v
+    mat[yi-miny, xi-minx] = zi
     plt.figure(figsize=(6,6))
     plt.imshow(mat, origin='lower')
     plt.colorbar(label='co2_g (proxy)')
-    out = os.path.join(os.path.dirname(summary_json), 'grid_heatmap.png')
+    out = os.path.join(out_dir, 'grid_heatmap.png')
     plt.savefig(out); plt.close()
     print("Saved:", out)
 
 def plot_eco_scores_timeseries(log_dir):
-    csvs = [f for f in os.listdir(log_dir) if f.endswith("_sustain.csv")]
+    csvs = [e for e in os.scandir(log_dir)
+            if e.name.endswith("_sustain.csv") and e.is_file()]
     if not csvs:
         print("No sustainability CSVs found")
         return
 
     plt.figure(figsize=(9,5))
 
-    for f in csvs:
-        path = os.path.join(log_dir, f)
-        df = pd.read_csv(path)
-        if 'eco_score' not in df.columns:
+    for e in csvs:
+        # sniff the header so logs without an eco score are never parsed
+        if 'eco_score' not in pd.read_csv(e.path, nrows=0).columns:
             continue
-        label = f.replace("vehicle_", "").replace("_sustain.csv", "")
+        df = load_vehicle_log(e.path, ['timestamp', 'eco_score'])
+        label = e.name.replace("vehicle_", "").replace("_sustain.csv", "")
         plt.plot(df['timestamp'], df['eco_score'], label=f"veh {label}")
 
     plt.xlabel("Time (s)")
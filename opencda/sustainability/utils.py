@@ -4,6 +4,17 @@
 
 import math
 
+import numpy as np
+
+# numba is optional; without it the kernels below run as plain numpy
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+        return wrap
+
 # Physical constants (SI)
 G = 9.81                      # m/s^2 gravity
 RHO_AIR = 1.225               # kg/m^3, air density at sea level
@@ -15,6 +26,16 @@ DEFAULT_CRR = 0.01            # rolling resistance coefficient
 DEFAULT_DRIVETRAIN_EFF = 0.9  # drivetrain efficiency (fraction)
 WATT_TO_WH = 1.0 / 3600.0     # convert Watt-seconds (J) to Watt-hours (Wh)
 
+# Emission factors
+J_PER_KWH = 3.6e6             # Joules per kWh
+FUEL_KWH_PER_L = 8.9          # energy content of gasoline (kWh per liter)
+FUEL_CO2_G_PER_L = 2310.0     # CO2 per liter of gasoline burned (g)
+GRID_CO2_G_PER_KWH = 400.0    # default grid carbon intensity (g per kWh)
+
+# Combustion emission factor folded to grams of CO2 per Joule of positive
+# energy (the electric factor depends on the grid intensity)
+CO2_FUEL_G_PER_J = FUEL_CO2_G_PER_L / FUEL_KWH_PER_L / J_PER_KWH
+
 # --- Helper physics functions ---
 
 def aerodynamic_force(cd: float, area: float, speed: float) -> float:
@@ -46,6 +67,30 @@ def kinetic_energy(mass: float, speed: float) -> float:
     return 0.5 * mass * (speed ** 2)
 
 
+@njit(cache=True, fastmath=True)
+def physics_step(speed, accel, slope, k_aero, f_roll, m_g, mass, inv_eff, eff,
+                 co2_per_j, dt):
+    """
+    Power, positive energy and CO2 for arrays of ticks in one fused pass.
+    Replaces the separate force helpers on the per-tick path.
+
+    All arguments are arrays of the same length, one entry per tick, so
+    ticks of several vehicles can be evaluated together. The vehicle
+    constants are pre-fused: k_aero = 0.5 * rho * cd * A,
+    f_roll = crr * m * g, m_g = m * g and inv_eff = 1 / eff. co2_per_j is
+    the vehicle's grams of CO2 per Joule of positive energy.
+
+    Returns (power_w, energy_j, co2_g) per tick. Energy and CO2 are only
+    accumulated while the drivetrain delivers power (power_w > 0).
+    """
+    power = (k_aero * speed * speed + f_roll + m_g * slope +
+             mass * accel) * speed
+    power = np.where(power >= 0, power * inv_eff, power * eff)
+    energy = np.where(power > 0, power * dt, 0.0)
+    co2 = energy * co2_per_j
+    return power, energy, co2
+
+
 def safe_div(a: float, b: float, default: float = 0.0) -> float:
     """
     Helper: safe division returning default if denominator is zero.
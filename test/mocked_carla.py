@@ -100,3 +100,59 @@ class Vehicle(object):
 
     def get_transform(self):
         return self.transform
+
+
+class Timestamp(object):
+    """A mock class for timestamp."""
+
+    def __init__(self, elapsed_seconds, delta_seconds):
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+
+
+class WorldSnapshot(object):
+    """A mock class for world snapshot."""
+
+    def __init__(self, elapsed_seconds, delta_seconds):
+        self.timestamp = Timestamp(elapsed_seconds, delta_seconds)
+
+
+class PhysicsControl(object):
+    """A mock class for vehicle physics control."""
+
+    def __init__(self, mass):
+        self.mass = mass
+
+
+class DrivingVehicle(object):
+    """
+    A mock class for a vehicle driving along the x axis with a
+    scripted acceleration profile.
+    """
+
+    def __init__(self, actor_id, accels, dt, mass=1500.0):
+        self.id = actor_id
+        self.attributes = {'role_name': 'autopilot'}
+        self.accels = accels
+        self.dt = dt
+        self.mass = mass
+        self.step = -1
+        self.x = 0.0
+        self.speed = 0.0
+
+    def tick(self):
+        self.step += 1
+        self.speed = max(0.0, self.speed + self.get_acceleration().x * self.dt)
+        self.x += self.speed * self.dt
+
+    def get_physics_control(self):
+        return PhysicsControl(self.mass)
+
+    def get_velocity(self):
+        return Vector3D(self.speed, 0.0, 0.0)
+
+    def get_acceleration(self):
+        return Vector3D(self.accels[self.step % len(self.accels)], 0.0, 0.0)
+
+    def get_location(self):
+        return Location(self.x, 0.0, 0.0)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for sustainability metrics.
+"""
+# License: MIT
+
+import contextlib
+import csv
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import numpy as np
+import pandas as pd
+
+import mocked_carla as mcarla
+from opencda.sustainability.evaluator import SustainabilityEvaluator
+from opencda.sustainability.metrics import DEFAULT_VEH_PARAMS, \
+    SustainabilityMetrics
+
+
+def reference_totals(vehicle, steps, params):
+    """Scalar reimplementation of the energy / co2 integration."""
+    energy_j = 0.0
+    co2_g = 0.0
+    distance_m = 0.0
+    for _ in range(steps):
+        vehicle.tick()
+        speed = vehicle.get_velocity().x
+        accel = vehicle.get_acceleration().x if speed > 0.1 else 0.0
+        distance_m += speed * vehicle.dt
+        force = 0.5 * 1.225 * params['cd'] * params['area'] * speed ** 2 + \
+            params['crr'] * vehicle.mass * 9.81 + vehicle.mass * accel
+        power = force * speed
+        power = power / params['drivetrain_eff'] if power >= 0 \
+            else power * params['drivetrain_eff']
+        if power > 0:
+            energy_j += power * vehicle.dt
+            co2_g += power * vehicle.dt / 3.6e6 / 8.9 * 2310.0
+    return energy_j, co2_g, distance_m
+
+
+class TestSustainabilityMetrics(unittest.TestCase):
+    def setUp(self):
+        self.dt = 0.05
+        self.accels = [1.0] * 40 + [3.0] * 5 + [0.0] * 20 + [-3.0] * 10
+        self.params = {'cd': 0.30, 'area': 2.2, 'crr': 0.01,
+                       'drivetrain_eff': 0.90}
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_metrics(self, steps, **veh_params):
+        vehicle = mcarla.DrivingVehicle(1, self.accels, self.dt)
+        metrics = SustainabilityMetrics(vehicle,
+                                        output_folder=self.tmp.name,
+                                        veh_params=veh_params,
+                                        model_type='ice',
+                                        sample_hz=20)
+        for step in range(steps):
+            vehicle.tick()
+            metrics.update(self.dt, (step + 1) * self.dt)
+        return metrics
+
+    def read_rows(self, metrics):
+        with open(metrics.csv_path) as f:
+            return list(csv.reader(f))
+
+    def make_metrics(self, vehicle, **veh_params):
+        return SustainabilityMetrics(vehicle, output_folder=self.tmp.name,
+                                     veh_params=veh_params)
+
+    def test_mass_param_skips_physics_control(self):
+        vehicle = mcarla.DrivingVehicle(1, self.accels, self.dt, mass=1200.0)
+        with mock.patch.object(vehicle, 'get_physics_control',
+                               wraps=vehicle.get_physics_control) as rpc:
+            metrics = self.make_metrics(vehicle, mass=900.0)
+            assert rpc.call_count == 0
+            assert metrics.mass == 900.0
+
+            metrics = self.make_metrics(vehicle)
+            assert rpc.call_count == 1
+            assert metrics.mass == 1200.0
+
+    def test_veh_params_merged_with_defaults(self):
+        vehicle = mcarla.DrivingVehicle(1, self.accels, self.dt)
+        metrics = self.make_metrics(vehicle, cd=0.25, chunk_size=8)
+        assert metrics.veh_params == {**DEFAULT_VEH_PARAMS,
+                                      'cd': 0.25, 'chunk_size': 8}
+        assert metrics.cd == 0.25
+        assert metrics.crr == DEFAULT_VEH_PARAMS['crr']
+        assert len(metrics._buf) == 8
+
+    def test_role_printed_only_when_verbose(self):
+        vehicle = mcarla.DrivingVehicle(1, self.accels, self.dt)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.make_metrics(vehicle)
+        assert out.getvalue() == ''
+
+        with contextlib.redirect_stdout(out):
+            self.make_metrics(vehicle, verbose=True)
+        assert 'autopilot' in out.getvalue()
+
+    def test_rows_buffered_until_batch(self):
+        metrics = self.run_metrics(3, batch_size=4)
+        assert len(self.read_rows(metrics)) == 1
+
+        metrics.close()
+        rows = self.read_rows(metrics)
+        assert len(rows) == 4
+        assert rows[0][0] == 'timestamp'
+
+    def test_totals_match_reference(self):
+        steps = 150
+        metrics = self.run_metrics(steps)
+        metrics.close()
+
+        vehicle = mcarla.DrivingVehicle(1, self.accels, self.dt)
+        energy_j, co2_g, distance_m = \
+            reference_totals(vehicle, steps, self.params)
+        assert math.isclose(metrics.energy_j, energy_j, rel_tol=1e-6)
+        assert math.isclose(metrics.co2_g, co2_g, rel_tol=1e-6)
+        assert math.isclose(metrics.distance_m, distance_m, rel_tol=1e-6)
+        assert metrics.harsh_accel > 0 and metrics.harsh_brake > 0
+
+        rows = self.read_rows(metrics)
+        assert len(rows) == steps + 1
+        assert math.isclose(float(rows[-1][8]), energy_j, rel_tol=1e-4)
+
+    def test_feather_matches_csv(self):
+        metrics = self.run_metrics(150)
+        metrics.close()
+        if metrics.feather_path is None:
+            self.skipTest('pyarrow not installed')
+        df = pd.read_feather(metrics.feather_path)
+        rows = self.read_rows(metrics)
+        assert list(df.columns) == rows[0]
+        assert len(df) == len(rows) - 1
+        assert math.isclose(df['cumulative_energy_j'].iloc[-1],
+                            float(rows[-1][8]), rel_tol=1e-4)
+
+    def test_stale_feather_removed(self):
+        feather_path = os.path.join(self.tmp.name, 'vehicle_1_sustain.feather')
+        with open(feather_path, 'w') as f:
+            f.write('stale')
+        self.run_metrics(3)
+        assert not os.path.exists(feather_path)
+
+    def test_compute_power_matches_reference(self):
+        metrics = self.run_metrics(1)
+        mass = metrics.mass
+        drag = 0.5 * 1.225 * self.params['cd'] * self.params['area']
+        force = drag * 100.0 + self.params['crr'] * mass * 9.81 + mass * 1.0
+        power = metrics.compute_power(10.0, 1.0)
+        assert isinstance(power, float)
+        assert math.isclose(power, force * 10.0 / self.params['drivetrain_eff'],
+                            rel_tol=1e-9)
+
+        powers = metrics.compute_power(np.array([10.0, 5.0]), 1.0)
+        assert powers.shape == (2,)
+        assert math.isclose(powers[0], power, rel_tol=1e-12)
+
+    def test_constant_jerk_variance(self):
+        # accel ramps at 0.3 m/s^3 while the speed stays at 5 m/s, so every
+        # jerk sample is 0.3 and the variance must come out as exactly >= 0
+        steps = 64
+        self.accels = [0.3 * (k + 1) * self.dt for k in range(steps)]
+        with mock.patch.object(mcarla.DrivingVehicle, 'get_velocity',
+                               return_value=mcarla.Vector3D(5.0, 0.0, 0.0)):
+            metrics = self.run_metrics(steps)
+            results = metrics.results()
+        metrics.close()
+        assert metrics._jerk_M2 >= 0.0
+        assert math.isclose(metrics._jerk_mean, 0.3, rel_tol=1e-9)
+        assert 0.0 <= results['eco_score'] <= 100.0
+
+    def test_failed_side_effects_count_once(self):
+        reference = self.run_metrics(8)
+        reference.close()
+
+        metrics = self.run_metrics(8, batch_size=1)
+        metrics.co2_sink = mock.Mock(side_effect=RuntimeError('sink down'))
+        with mock.patch.object(pd.DataFrame, 'to_csv',
+                               side_effect=OSError('disk full')):
+            metrics._flush_physics()
+        metrics._flush_physics()
+        metrics.close()
+
+        assert metrics.co2_sink.call_count == 1
+        assert metrics.energy_j == reference.energy_j
+        assert metrics.co2_g == reference.co2_g
+        assert metrics.distance_m == reference.distance_m
+        assert len(self.read_rows(metrics)) == 8 + 1
+
+    def test_close_writes_rows_when_physics_fails(self):
+        metrics = self.run_metrics(8)
+        metrics._flush_physics()
+        with mock.patch.object(metrics, '_flush_physics',
+                               side_effect=RuntimeError('boom')):
+            metrics.close()
+        assert len(self.read_rows(metrics)) == 8 + 1
+
+    def test_eco_score_range(self):
+        metrics = self.run_metrics(150)
+        metrics.close()
+        score = metrics.results()['eco_score']
+        assert 0.0 <= score <= 100.0
+        assert metrics.compute_eco_score() == score
+
+        rows = self.read_rows(metrics)
+        assert math.isclose(float(rows[-1][11]), score, abs_tol=0.01)
+
+
+class TestSustainabilityEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.dt = 0.05
+        self.tmp = tempfile.TemporaryDirectory()
+        self.evaluator = SustainabilityEvaluator(cell_size_m=10,
+                                                 log_folder=self.tmp.name)
+        self.vehicles = [mcarla.DrivingVehicle(i, [1.0, 0.5, 0.0], self.dt)
+                         for i in range(3)]
+        for vehicle in self.vehicles:
+            self.evaluator.register_vehicle(vehicle)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_grid_sums_to_vehicle_co2(self):
+        for step in range(300):
+            for vehicle in self.vehicles:
+                vehicle.tick()
+            self.evaluator.update(mcarla.WorldSnapshot((step + 1) * self.dt,
+                                                       self.dt))
+        out_path = os.path.join(self.tmp.name, 'summary.json')
+        self.evaluator.finalize(out_path)
+
+        with open(out_path) as f:
+            summary = json.load(f)
+        total = sum(v['co2_g'] for v in summary['vehicles'])
+        assert len(summary['vehicles']) == 3
+
+        with np.load(os.path.join(self.tmp.name,
+                                  summary['grid_file'])) as grid:
+            assert len(grid['co2']) > 1
+            assert math.isclose(grid['co2'].sum(), total, rel_tol=1e-6)
+
+    def test_repeated_snapshot_skipped(self):
+        for vehicle in self.vehicles:
+            vehicle.tick()
+        snapshot = mcarla.WorldSnapshot(self.dt, self.dt)
+        self.evaluator.update(snapshot)
+        self.evaluator.update(snapshot)
+        assert all(m._bi == 1 for m in self.evaluator._slots)
+
+    def test_failed_flush_keeps_ticks(self):
+        for vehicle in self.vehicles:
+            vehicle.tick()
+        self.evaluator.update(mcarla.WorldSnapshot(self.dt, self.dt))
+        broken = self.evaluator._slots[1]
+        with mock.patch.object(broken, '_accumulate',
+                               side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                self.evaluator._flush()
+        assert [m._bi for m in self.evaluator._slots] == [0, 1, 1]
+
+        self.evaluator._flush()
+        assert all(m._bi == 0 for m in self.evaluator._slots)
+        assert broken.distance_m > 0
+
+    def test_grid_skips_out_of_bounds(self):
+        xs = np.array([-1000.5, -999.5, 0.0, 5000.0])
+        ys = np.array([0.0, 0.0, -1000.5, 0.0])
+        self.evaluator._add_co2(xs, ys, np.ones(4))
+        assert self.evaluator._grid.sum() == 1.0
+        assert self.evaluator._grid[0, 100] == 1.0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Unit test for sustainability plotting.
+"""
+# License: MIT
+
+import os
+import sys
+import tempfile
+import unittest
+
+# temporary solution for relative imports in case opencda is not installed
+# if opencda is installed, no need to use the following line
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import mocked_carla as mcarla
+from opencda.sustainability.evaluator import SustainabilityEvaluator
+from opencda.sustainability.plotting import load_summary, load_vehicle_log, \
+    plot_eco_scores, plot_eco_scores_timeseries, plot_grid_heatmap, \
+    plot_vehicle_energy
+
+
+class TestSustainabilityPlotting(unittest.TestCase):
+    def setUp(self):
+        self.dt = 0.05
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir = self.tmp.name
+        evaluator = SustainabilityEvaluator(cell_size_m=10,
+                                            log_folder=self.log_dir)
+        vehicles = [mcarla.DrivingVehicle(i, [1.0, 0.5, 0.0], self.dt)
+                    for i in range(2)]
+        for vehicle in vehicles:
+            evaluator.register_vehicle(vehicle)
+        for step in range(100):
+            for vehicle in vehicles:
+                vehicle.tick()
+            evaluator.update(mcarla.WorldSnapshot((step + 1) * self.dt,
+                                                  self.dt))
+        self.summary_path = os.path.join(self.log_dir, 'summary.json')
+        evaluator.finalize(self.summary_path)
+        self.csv_path = os.path.join(self.log_dir, 'vehicle_0_sustain.csv')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def out(self, name):
+        return os.path.join(self.log_dir, name)
+
+    def test_parsed_summary_plots_next_to_json(self):
+        summary = load_summary(self.summary_path)
+        assert set(summary) == {'vehicles', 'grid_file', 'grid_shape'}
+        plot_eco_scores(summary, summary_dir=self.log_dir)
+        plot_grid_heatmap(summary, summary_dir=self.log_dir)
+        assert os.path.exists(self.out('eco_scores.png'))
+        assert os.path.exists(self.out('grid_heatmap.png'))
+
+    def test_grid_read_from_summary_folder(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            plot_grid_heatmap(self.summary_path, out_dir=out_dir)
+            assert os.path.exists(os.path.join(out_dir, 'grid_heatmap.png'))
+            os.remove(os.path.join(out_dir, 'grid_heatmap.png'))
+
+            plot_grid_heatmap(load_summary(self.summary_path),
+                              out_dir=out_dir, summary_dir=self.log_dir)
+            assert os.path.exists(os.path.join(out_dir, 'grid_heatmap.png'))
+        assert not os.path.exists(self.out('grid_heatmap.png'))
+
+    def test_dict_summary_requires_folder(self):
+        summary = {'vehicles': [], 'grid_file': 'summary.grid.npz'}
+        with self.assertRaises(ValueError):
+            plot_grid_heatmap(summary)
+
+        plot_grid_heatmap(summary, out_dir=self.log_dir)
+        assert os.path.exists(self.out('grid_heatmap.png'))
+
+    def test_load_vehicle_log_columns(self):
+        df = load_vehicle_log(self.csv_path, ['timestamp', 'eco_score'])
+        assert list(df.columns) == ['timestamp', 'eco_score']
+        assert all(dtype == 'float32' for dtype in df.dtypes)
+        assert len(df) == len(pd.read_csv(self.csv_path))
+
+    def test_timeseries_skips_logs_without_eco_score(self):
+        with open(self.out('vehicle_9_sustain.csv'), 'w') as f:
+            f.write('timestamp,speed_mps\n0.1,1.0\n')
+        plot_eco_scores_timeseries(self.log_dir)
+        assert os.path.exists(self.out('eco_scores.png'))
+
+    def test_vehicle_energy_reuses_axes(self):
+        fig, ax = plt.subplots()
+        try:
+            for vid in range(2):
+                plot_vehicle_energy(self.out(f'vehicle_{vid}_sustain.csv'),
+                                    ax=ax)
+                assert len(ax.lines) == 1
+            assert plt.fignum_exists(fig.number)
+        finally:
+            plt.close(fig)
+        assert os.path.exists(self.out('vehicle_0_sustain_energy.png'))
+        assert os.path.exists(self.out('vehicle_1_sustain_energy.png'))
+
+
+if __name__ == '__main__':
+    unittest.main()